@@ -2,13 +2,158 @@ import logging
 import json
 import re
 import html
-from typing import Dict, Optional, Union
+import string
+from typing import Dict, List, Optional, Tuple, Union
 from openai import AsyncOpenAI, OpenAIError
 import aiohttp
 import asyncio
+from collections import deque
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 
 logger = logging.getLogger('AsyncAI')
 
+# Быстрый JSON-декодер, если установлен (orjson/ujson), иначе стандартный json.
+# Все они при ошибке разбора выбрасывают подкласс ValueError.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        _json_loads = ujson.loads
+    except ImportError:
+        _json_loads = json.loads
+
+# Токенизатор для предварительной оценки размера промпта (опционально)
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Предкомпилированные регулярные выражения
+_CODE_FENCE_START_RE = re.compile(r'^```(?:json)?\s*', re.IGNORECASE)
+_CODE_FENCE_END_RE = re.compile(r'```$')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+_FORCE_JSON_DOUBLE_RE = re.compile(
+    r'\{[\s\n]*"title"[\s\n]*:[\s\n]*"[^"]*"[\s\n]*,[\s\n]*"description"[\s\n]*:[\s\n]*"[^"]*"[\s\n]*\}',
+    re.DOTALL | re.IGNORECASE
+)
+_FORCE_JSON_SINGLE_RE = re.compile(
+    r"\{[\s\n]*'title'[\s\n]*:[\s\n]*'[^']*'[\s\n]*,[\s\n]*'description'[\s\n]*:[\s\n]*'[^']*'[\s\n]*\}",
+    re.DOTALL | re.IGNORECASE
+)
+
+# Обязательные ключи JSON-ответа
+_REQUIRED_KEYS = frozenset(('title', 'description'))
+
+# Маркеры низкокачественного ответа
+_QUALITY_PHRASES = (
+    "в интернете есть много сайтов",
+    "посмотрите, что нашлось в поиске",
+    "дополнительные материалы:",
+    "смотрите также:",
+    "читайте далее",
+    "читайте также",
+    "рекомендуем прочитать",
+    "подробнее на сайте",
+    "другие источники:",
+    "больше информации можно найти"
+)
+# Ограниченные классы символов исключают катастрофический бэктрекинг
+_MARKDOWN_LINK_PATTERN = r"\[[^\]]{0,200}\]\(https?://[^\)]{1,500}\)"
+
+# Все маркеры, объединенные в одно выражение
+_QUALITY_RE = re.compile(
+    '|'.join([re.escape(phrase) for phrase in _QUALITY_PHRASES] + [_MARKDOWN_LINK_PATTERN]),
+    re.IGNORECASE
+)
+
+# Расширенные шаблоны для извлечения данных из текстового ответа
+_TEXT_PATTERNS = tuple(re.compile(p, re.DOTALL | re.IGNORECASE) for p in [
+    r'(?i)title["\']?:\s*["\'](.+?)["\']',
+    r'(?i)заголовок["\']?:\s*["\'](.+?)["\']',
+    r'(?i)(?:title|заголовок)[\s:]*["\']?(.+?)["\']?(?:\n|$|\.)',
+    r'(?i)(?:description|описание)[\s:]*["\']?(.+?)["\']?(?:\n|$|\.)',
+    r'{"title"\s*:\s*"([^"]+)"[^}]*"description"\s*:\s*"([^"]+)"}',
+    r'<title>(.+?)</title>\s*<description>(.+?)</description>',
+    r'(?i)(?:заголовок|title):?\s*([^\n]+)\n+(?:описание|description):?\s*([^\n]+)'
+])
+_PARA_SEPARATORS = ('\n\n', '\n-', '\n•')
+# Шаблоны, которые могут дать и заголовок, и описание
+_PAIR_PATTERNS = frozenset(p for p in _TEXT_PATTERNS if p.groups >= 2)
+_SENT_SPLIT_RE = re.compile(r'[.!?]\s+')
+
+# Управляющие символы (C0 и C1), удаляемые через str.translate
+_CTRL_CHARS = dict.fromkeys([*range(0x00, 0x20), *range(0x7F, 0xA0)])
+
+# Таблица замен для экранирования пользовательского ввода в промпте
+_PROMT_TRANS = {**_CTRL_CHARS, **str.maketrans({
+    '{': '{{',
+    '}': '}}',
+    '[': '【',
+    ']': '】',
+    '(': '（',
+    ')': '）',
+    '"': '\\"',
+    "'": "\\'",
+    '\n': ' ',
+    '\r': ' ',
+    '\t': ' '
+})}
+
+# Таблица экранирования HTML для Telegram
+_HTML_ESCAPE_TRANS = {**_CTRL_CHARS, **str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&apos;'
+})}
+
+@lru_cache(maxsize=2048)
+def _sanitize_promt_input_impl(text: str) -> str:
+    """Экранирует специальные символы (кэшируется для повторных запросов)"""
+    return html.escape(text).translate(_PROMT_TRANS)[:5000]
+
+@lru_cache(maxsize=2048)
+def _sanitize_text_impl(text: str) -> str:
+    """Экранирует HTML для Telegram (кэшируется для повторных запросов)"""
+    return text.translate(_HTML_ESCAPE_TRANS)
+
+@dataclass(slots=True)
+class AIStats:
+    """Счетчики использования AI"""
+    ai_used: int = 0
+    ai_errors: int = 0
+    token_usage: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+def _split_first_paragraph(text: str) -> list:
+    """Делит текст по первому разделителю абзаца (все разделители длиной 2 символа)"""
+    positions = [pos for pos in (text.find(sep) for sep in _PARA_SEPARATORS) if pos >= 0]
+    if not positions:
+        return [text]
+    pos = min(positions)
+    return [text[:pos], text[pos + 2:]]
+
+def _split_promt_template(template: str) -> Optional[tuple]:
+    """Разбирает шаблон промпта на пары (текст, поле) один раз.
+    Возвращает None, если шаблон использует что-то кроме {title}/{description}
+    или некорректен - тогда ошибка всплывет в template.format при запросе"""
+    parts = []
+    try:
+        for literal, field, spec, conversion in string.Formatter().parse(template):
+            if field is not None and (field not in ('title', 'description') or spec or conversion):
+                return None
+            parts.append((literal, field))
+    except ValueError:
+        return None
+    return tuple(parts)
+
 class AsyncAI:
     def __init__(self, config, session: aiohttp.ClientSession = None):
         self.config = config
@@ -25,19 +170,35 @@ class AsyncAI:
         else:
             # Для других провайдеров используем aiohttp
             self.client = None
+
+        # Собственная сессия с пулом keep-alive соединений для кастомного API.
+        # Общая сессия бота периодически пересоздается контроллером,
+        # поэтому держать на ней соединения к API между запросами нельзя.
+        self._api_session: Optional[aiohttp.ClientSession] = None
         
         # Инициализация статистики
-        self.stats = {
-            'ai_used': 0,
-            'ai_errors': 0,
-            'token_usage': 0
-        }
+        self.stats = AIStats()
 
         # Счетчики ошибок для автоотключения
         self.error_count = 0
         self.consecutive_errors = 0
         self.max_consecutive_errors = config.AI_ERROR_THRESHOLD
 
+        # Ограничение параллельных запросов и частоты обращений к API
+        self._semaphore = asyncio.Semaphore(max(1, config.MAX_CONCURRENT_AI_REQUESTS))
+        self._rate_lock = asyncio.Lock()
+        self._request_times = deque()
+
+        # Разобранный шаблон промпта (перестраивается при изменении AI_PROMT)
+        self._promt_source = config.AI_PROMT
+        self._promt_parts = _split_promt_template(config.AI_PROMT)
+
+        # Токенизатор для оценки длины промпта (создается лениво под текущую модель).
+        # None после попытки загрузки означает оценку по числу символов
+        self._encoder_model = None
+        self._encoder = None
+        self._encoder_lock = asyncio.Lock()
+
         logger.info(f"AI Provider initialized. Active: {self.active}, Type: {config.AI_PROVIDER_TYPE}, Model: {config.AI_MODEL}")
 
     def is_available(self) -> bool:
@@ -51,26 +212,89 @@ class AsyncAI:
         if not isinstance(text, str):
             return ""
 
-        sanitized = html.escape(text)
-        replacements = {
-            '{': '{{',
-            '}': '}}',
-            '[': '【',
-            ']': '】',
-            '(': '（',
-            ')': '）',
-            '"': '\\"',
-            "'": "\\'",
-            '\n': ' ',
-            '\r': ' ',
-            '\t': ' '
-        }
+        return _sanitize_promt_input_impl(text)
+
+    def _build_promt(self, title: str, description: str) -> str:
+        """Подставляет данные в заранее разобранный шаблон промпта"""
+        template = self.config.AI_PROMT
+        if template != self._promt_source:
+            self._promt_source = template
+            self._promt_parts = _split_promt_template(template)
+
+        if self._promt_parts is None:
+            return template.format(title=title, description=description)
+
+        values = {'title': title, 'description': description, None: ''}
+        return ''.join([literal + values[field] for literal, field in self._promt_parts])
 
-        for char, replacement in replacements.items():
-            sanitized = sanitized.replace(char, replacement)
+    @staticmethod
+    def _load_encoder(model: str):
+        """Создает токенизатор tiktoken для модели; None, если загрузить не удалось"""
+        try:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                return tiktoken.get_encoding('cl100k_base')
+        except Exception as e:
+            # Первая загрузка скачивает BPE-файл и может упасть без сети
+            logger.warning(f"tiktoken encoder unavailable, using character estimate: {str(e)}")
+            return None
+
+    async def _ensure_encoder(self):
+        """Один раз на модель создает токенизатор в отдельном потоке, не блокируя event loop"""
+        if tiktoken is None:
+            return
+        model = self.config.AI_MODEL
+        if model == self._encoder_model:
+            return
+        async with self._encoder_lock:
+            if model != self._encoder_model:
+                self._encoder = await asyncio.to_thread(self._load_encoder, model)
+                self._encoder_model = model
+
+    def _count_tokens(self, text: str) -> int:
+        """Оценивает число токенов в тексте"""
+        if self._encoder is None or self._encoder_model != self.config.AI_MODEL:
+            # Грубая оценка без tiktoken: ~3 символа на токен
+            return len(text) // 3 + 1
+        return len(self._encoder.encode(text, disallowed_special=()))
+
+    async def _exceeds_context(self, promt: str) -> bool:
+        """Проверяет, что промпт вместе с ответом не помещается в контекст модели"""
+        limit = self.config.AI_CONTEXT_LIMIT
+        if limit <= 0:
+            return False
+        await self._ensure_encoder()
+        return self._count_tokens(promt) + self.config.AI_MAX_TOKENS > limit
 
-        sanitized = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', sanitized)
-        return sanitized[:5000]
+    async def _throttle(self):
+        """Ожидает, пока не освободится место в лимите запросов в минуту"""
+        limit = self.config.AI_REQUESTS_PER_MINUTE
+        if limit <= 0:
+            return
+
+        loop = asyncio.get_running_loop()
+        async with self._rate_lock:
+            now = loop.time()
+            while self._request_times and now - self._request_times[0] >= 60:
+                self._request_times.popleft()
+
+            if len(self._request_times) >= limit:
+                await asyncio.sleep(60 - (now - self._request_times[0]))
+                self._request_times.popleft()
+
+            self._request_times.append(loop.time())
+
+    async def enhance_many(self, items: List[Tuple[str, str]]) -> List[Optional[Dict]]:
+        """
+        Улучшает несколько пар (title, description) параллельно
+        Число одновременных запросов ограничено MAX_CONCURRENT_AI_REQUESTS
+        """
+        results = await asyncio.gather(
+            *(self.enhance(title, description) for title, description in items),
+            return_exceptions=True
+        )
+        return [None if isinstance(result, BaseException) else result for result in results]
 
     async def enhance(self, title: str, description: str) -> Optional[Dict]:
         """
@@ -82,34 +306,35 @@ class AsyncAI:
 
         try:
             # Формирование промпта
-            promt = self.config.AI_PROMT.format(
-                title=self._sanitize_promt_input(title),
-                description=self._sanitize_promt_input(description)
+            promt = self._build_promt(
+                self._sanitize_promt_input(title),
+                self._sanitize_promt_input(description)
             )
 
+            # Не отправляем запрос, который заведомо не поместится в контекст модели
+            if await self._exceeds_context(promt):
+                logger.warning("Prompt exceeds AI context limit, skipping request")
+                return None
+
             # Отправка запроса в зависимости от типа провайдера
-            if self.config.AI_PROVIDER_TYPE == "openai":
-                response = await self.client.chat.completions.create(
-                    model=self.config.AI_MODEL,
-                    messages=[{"role": "user", "content": promt}],
-                    max_tokens=self.config.AI_MAX_TOKENS,
-                    temperature=self.config.AI_TEMPERATURE,
-                )
-                result_text = response.choices[0].message.content
-            else:
-                # Для других провайдеров
-                result_text = await self._make_custom_api_request(promt)
+            async with self._semaphore:
+                await self._throttle()
+                if self.config.AI_PROVIDER_TYPE == "openai":
+                    result_text = await self._stream_completion(promt)
+                else:
+                    # Для других провайдеров
+                    result_text = await self._make_custom_api_request(promt)
 
             # Парсим результат
             parsed_response = self.parse_response(result_text)
             if parsed_response:
-                self.stats['ai_used'] += 1
+                self.stats.ai_used += 1
                 self.consecutive_errors = 0
                 
                 # Проверка качества ответа
                 if self.is_low_quality_response(parsed_response['description']):
                     logger.warning("Low quality response detected")
-                    self.stats['ai_errors'] += 1
+                    self.stats.ai_errors += 1
                     return None
                     
                 return parsed_response
@@ -123,17 +348,100 @@ class AsyncAI:
             self._handle_error(str(e), {})
             return None
 
+    async def _stream_completion(self, promt: str) -> str:
+        """
+        Получает ответ OpenAI-совместимого API потоком
+        Чтение прекращается, как только накопленный текст содержит полный JSON-объект
+        """
+        stream = await self.client.chat.completions.create(
+            model=self.config.AI_MODEL,
+            messages=[{"role": "user", "content": promt}],
+            max_tokens=self.config.AI_MAX_TOKENS,
+            temperature=self.config.AI_TEMPERATURE,
+            stream=True,
+        )
+
+        chunks = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                chunks.append(delta)
+
+                # Ранний выход: ответ уже содержит завершенный JSON
+                if delta.rstrip().endswith('}'):
+                    text = ''.join(chunks)
+                    start = text.find('{')
+                    if start != -1:
+                        try:
+                            _json_loads(text[start:])
+                            break
+                        except ValueError:
+                            pass
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                await close()
+
+        return ''.join(chunks)
+
+    def _get_api_session(self) -> aiohttp.ClientSession:
+        """Возвращает (создавая при необходимости) сессию для кастомного API"""
+        if self._api_session is None or self._api_session.closed:
+            pool_size = max(1, self.config.MAX_CONCURRENT_AI_REQUESTS)
+            self._api_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=pool_size,
+                    limit_per_host=pool_size,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=30
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.config.AI_REQUEST_TIMEOUT)
+            )
+        return self._api_session
+
+    async def close(self):
+        """Закрывает собственную HTTP-сессию"""
+        if self._api_session and not self._api_session.closed:
+            await self._api_session.close()
+        self._api_session = None
+
     async def _make_custom_api_request(self, prompt: str) -> str:
-        """Выполняет запрос к кастомному API"""
-        # Реализация зависит от конкретного провайдера
-        # Здесь можно добавить логику для разных API
-        return ""
+        """Выполняет запрос к кастомному API (формат OpenAI chat completions)"""
+        payload = {
+            "model": self.config.AI_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": self.config.AI_MAX_TOKENS,
+            "temperature": self.config.AI_TEMPERATURE,
+        }
+        headers = {'Authorization': f'Bearer {self.config.AI_API_KEY}'}
+
+        async with self._get_api_session().post(
+            self.config.AI_BASE_URL,
+            json=payload,
+            headers=headers
+        ) as response:
+            response.raise_for_status()
+            text = await response.text()
+
+            # JSON-ответ провайдера: достаем из него текст модели
+            if response.content_type == 'application/json':
+                try:
+                    data = _json_loads(text)
+                except ValueError:
+                    return text
+                if isinstance(data, dict):
+                    return self._extract_text_from_response(data) or text
+            return text
 
     def _handle_error(self, error: str, request_data: dict):
         """Обрабатывает ошибки и обновляет счетчики"""
         self.error_count += 1
         self.consecutive_errors += 1
-        self.stats['ai_errors'] += 1
+        self.stats.ai_errors += 1
         
         logger.error(f"AI API error: {error}")
         
@@ -147,22 +455,7 @@ class AsyncAI:
         if not text:
             return True
 
-        quality_indicators = [
-            "в интернете есть много сайтов",
-            "посмотрите, что нашлось в поиске",
-            "дополнительные материалы:",
-            "смотрите также:",
-            "читайте далее",
-            "читайте также",
-            "рекомендуем прочитать",
-            "подробнее на сайте",
-            "другие источники:",
-            "больше информации можно найти",
-            r"\[.*\]\(https?://[^\)]+\)"  # Markdown ссылки
-        ]
-
-        text_lower = text.lower()
-        return any(re.search(phrase, text_lower) for phrase in quality_indicators)
+        return _QUALITY_RE.search(text) is not None
 
     def parse_response(self, data: Union[Dict, str]) -> Optional[Dict]:
         """Парсит ответ от API с очисткой от Markdown-разметки"""
@@ -170,30 +463,33 @@ class AsyncAI:
             # Если data - это строка, очищаем от всей Markdown-разметки
             if isinstance(data, str):
                 # Удаляем все возможные варианты обрамления кода
-                data = re.sub(r'^```(?:json)?\s*', '', data, flags=re.IGNORECASE)
-                data = re.sub(r'```$', '', data)
+                data = _CODE_FENCE_START_RE.sub('', data)
+                data = _CODE_FENCE_END_RE.sub('', data)
                 
                 # Удаляем возможные HTML/XML теги
-                data = re.sub(r'<[^>]+>', '', data)
+                data = _HTML_TAG_RE.sub('', data)
                 
                 # Удаляем лишние пробелы и переносы строк
                 data = data.strip()
                 
                 # Ищем JSON в строке с помощью регулярного выражения
-                json_match = re.search(r'\{.*\}', data, re.DOTALL)
+                json_match = _JSON_OBJECT_RE.search(data)
                 if json_match:
                     data = json_match.group(0)
+                elif not data.startswith('['):
+                    # Явно не JSON - не тратим время на декодер и исключение
+                    return self._parse_text_response(data)
                 
                 try:
-                    data = json.loads(data)
-                except json.JSONDecodeError:
+                    data = _json_loads(data)
+                except ValueError:
                     # Логируем сырой ответ для отладки
                     logger.debug(f"Raw AI response that failed to parse: {data[:200]}...")
                     return self._parse_text_response(data)
             
             # Дальнейшая обработка JSON
             if isinstance(data, dict):
-                if 'title' in data and 'description' in data:
+                if _REQUIRED_KEYS.issubset(data):
                     return {
                         'title': self._sanitize_text(data['title'])[:self.config.MAX_TITLE_LENGTH],
                         'description': self._sanitize_text(data['description'])[:self.config.MAX_DESC_LENGTH]
@@ -213,24 +509,22 @@ class AsyncAI:
         """Принудительно извлекает JSON из текста с помощью регулярных выражений"""
         try:
             # Ищем шаблон JSON с title и description
-            pattern = r'\{[\s\n]*"title"[\s\n]*:[\s\n]*"[^"]*"[\s\n]*,[\s\n]*"description"[\s\n]*:[\s\n]*"[^"]*"[\s\n]*\}'
-            match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
+            match = _FORCE_JSON_DOUBLE_RE.search(text)
             
             if match:
                 json_str = match.group(0)
                 # Заменяем умные кавычки на обычные
                 json_str = json_str.replace('“', '"').replace('”', '"').replace('‘', "'").replace('’', "'")
-                return json.loads(json_str)
+                return _json_loads(json_str)
             
             # Альтернативный шаблон с одинарными кавычками
-            pattern2 = r"\{[\s\n]*'title'[\s\n]*:[\s\n]*'[^']*'[\s\n]*,[\s\n]*'description'[\s\n]*:[\s\n]*'[^']*'[\s\n]*\}"
-            match2 = re.search(pattern2, text, re.DOTALL | re.IGNORECASE)
+            match2 = _FORCE_JSON_SINGLE_RE.search(text)
             
             if match2:
                 json_str = match2.group(0)
                 # Заменяем одинарные кавычки на двойные для корректного парсинга JSON
                 json_str = json_str.replace("'", '"')
-                return json.loads(json_str)
+                return _json_loads(json_str)
                 
             return None
         except Exception as e:
@@ -240,56 +534,48 @@ class AsyncAI:
     def _extract_text_from_response(self, data: Dict) -> Optional[str]:
         """Извлекает текст из ответов разных провайдеров"""
         # Для OpenAI-совместимых провайдеров
-        if 'choices' in data and len(data['choices']) > 0:
-            choice = data['choices'][0]
-            if 'message' in choice and 'content' in choice['message']:
-                return choice['message']['content']
-        
-        return None
+        try:
+            return data['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError):
+            return None
 
     def _parse_text_response(self, text: str) -> Optional[Dict]:
         """Парсит текстовый ответ"""
-        # Расширенные шаблоны для извлечения данных
-        patterns = [
-            r'(?i)title["\']?:\s*["\'](.+?)["\']',
-            r'(?i)заголовок["\']?:\s*["\'](.+?)["\']',
-            r'(?i)(?:title|заголовок)[\s:]*["\']?(.+?)["\']?(?:\n|$|\.)',
-            r'(?i)(?:description|описание)[\s:]*["\']?(.+?)["\']?(?:\n|$|\.)',
-            r'{"title"\s*:\s*"([^"]+)"[^}]*"description"\s*:\s*"([^"]+)"}',
-            r'<title>(.+?)</title>\s*<description>(.+?)</description>',
-            r'(?i)(?:заголовок|title):?\s*([^\n]+)\n+(?:описание|description):?\s*([^\n]+)'
-        ]
-
         title_match = None
         desc_match = None
 
-        # Поиск заголовка
-        for pattern in patterns:
-            match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-            if match and match.lastindex >= 1:
+        # Поиск заголовка и описания за один проход по шаблонам
+        for pattern in _TEXT_PATTERNS:
+            # Когда заголовок найден, шаблоны без описания больше не нужны
+            if title_match and pattern not in _PAIR_PATTERNS:
+                continue
+
+            match = pattern.search(text)
+            if not match or not match.lastindex:
+                continue
+
+            if not title_match:
                 title_candidate = match.group(1).strip()
                 if len(title_candidate) > 5:
                     title_match = title_candidate
-                    break
-
-        # Поиск описания
-        if title_match:
-            for pattern in patterns:
-                match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-                if match and match.lastindex >= 2:
-                    desc_candidate = match.group(2).strip()
-                    if len(desc_candidate) > 10:
-                        desc_match = desc_candidate
-                        break
+
+            if not desc_match and match.lastindex >= 2:
+                desc_candidate = match.group(2).strip()
+                if len(desc_candidate) > 10:
+                    desc_match = desc_candidate
+
+            if title_match and desc_match:
+                break
 
         # Fallback стратегии
         if not title_match or not desc_match:
-            parts = re.split(r'\n\n|\n-|\n•', text, maxsplit=1)
+            parts = _split_first_paragraph(text)
             if len(parts) >= 2:
                 title_match = parts[0].strip()
                 desc_match = parts[1].strip()
             else:
-                sentences = re.split(r'[.!?]\s+', text)
+                # Используются только первые три предложения
+                sentences = _SENT_SPLIT_RE.split(text, maxsplit=3)
                 if len(sentences) > 1:
                     title_match = sentences[0]
                     desc_match = ' '.join(sentences[1:3])[:500]
@@ -307,12 +593,4 @@ class AsyncAI:
         """Sanitizes text for Telegram HTML parsing while preserving emoji and Unicode"""
         if not text:
             return ""
-        sanitized = re.sub(r'[\x00-\x1F\x7F-\x9F]', '', str(text))
-        return (
-            sanitized
-            .replace('&', '&amp;')
-            .replace('<', '&lt;')
-            .replace('>', '&gt;')
-            .replace('"', '&quot;')
-            .replace("'", "&apos;")
-        )
\ No newline at end of file
+        return _sanitize_text_impl(str(text))
\ No newline at end of file
@@ -16,7 +16,7 @@ from typing import Dict, List, Optional, Tuple, Any, Union
 from urllib.parse import urlparse
 from PIL import Image
 from functools import lru_cache
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import pytz
 from telegram import CallbackQuery
 from rss_parser import AsyncRSSParser
@@ -25,6 +25,18 @@ from ai import AsyncAI
 
 logger = logging.getLogger('bot.controller')
 
+# Бэкенд BeautifulSoup: lxml (libxml2) заметно быстрее встроенного html.parser
+try:
+    import lxml  # noqa: F401
+    _BS4_PARSER = 'lxml'
+except ImportError:
+    _BS4_PARSER = 'html.parser'
+    logger.warning("lxml is not installed, falling back to html.parser for HTML parsing")
+
+# Разбираем только нужные теги, не строя полное дерево документа
+_META_AND_IMG_STRAINER = SoupStrainer(['meta', 'img'])
+_IMG_STRAINER = SoupStrainer('img')
+
 class BotController:
     def __init__(self, config, state_manager, rss_parser, image_generator, AI, telegram_bot):
         self.config = config
@@ -132,15 +144,8 @@ class BotController:
                 self.active)
 
     async def _create_session(self) -> aiohttp.ClientSession:
-        """Создает новую aiohttp сессию"""
-        return aiohttp.ClientSession(
-            connector=aiohttp.TCPConnector(
-                force_close=True,
-                enable_cleanup_closed=True,
-                limit=0
-            ),
-            timeout=aiohttp.ClientTimeout(total=30)
-        )
+        """Создает новую aiohttp сессию с пулом keep-alive соединений"""
+        return AsyncRSSParser.default_session()
     
     async def _recreate_session(self):
         """Пересоздает HTTP-сессию и обновляет зависимости"""
@@ -247,6 +252,8 @@ class BotController:
         """Безопасное освобождение ресурсов"""
         if self.session and not self.session.closed:
             await self.session.close()
+        if self.AI and hasattr(self.AI, 'close'):
+            await self.AI.close()
         if hasattr(self.image_generator, 'shutdown'):
             self.image_generator.shutdown()
         if self.image_executor:
@@ -469,8 +476,8 @@ class BotController:
                     logger.info("🚫 Лента пуста: %s", url)
                     continue
                     
-                # Парсинг записей
-                entries = self.rss_parser.parse_entries(feed_content)
+                # Парсинг записей (разбор HTML) в отдельном потоке, чтобы не блокировать event loop
+                entries = await asyncio.to_thread(self.rss_parser.parse_entries, feed_content, url)
                 if not entries:
                     logger.info("🔍 Нет новых записей в ленте: %s", url)
                     continue
@@ -1184,7 +1191,7 @@ class BotController:
             from bs4 import BeautifulSoup, Tag
             from bs4.element import NavigableString
 
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, _BS4_PARSER, parse_only=_META_AND_IMG_STRAINER)
             
             # 1. Проверка OpenGraph/twitter изображений
             for meta in soup.find_all('meta'):
@@ -1231,7 +1238,7 @@ class BotController:
             return None
 
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, _BS4_PARSER, parse_only=_IMG_STRAINER)
             
             # Поиск контентных изображений с приоритетом
             content_images = []
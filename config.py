@@ -363,6 +363,8 @@ class Config:
         self.ENABLE_AI: bool = self.get_env_var('ENABLE_AI', default=True, var_type=bool)
         self.AI_TEMPERATURE: float = self.get_env_var('AI_TEMPERATURE', default=0.4, var_type=float)
         self.AI_MAX_TOKENS: int = self.get_env_var('AI_MAX_TOKENS', default=2500, var_type=int)
+        self.AI_CONTEXT_LIMIT: int = self.get_env_var('AI_CONTEXT_LIMIT', default=0, var_type=int)
+        self.AI_REQUEST_TIMEOUT: int = self.get_env_var('AI_REQUEST_TIMEOUT', default=60, var_type=int)
         self.AI_PROMT = self.get_env_var(
             "AI_PROMT", 
             default="Улучши заголовок и описание: '{title}' - '{description}' Верни ответ без пояснений с ключами 'title' - 'description'. Заголовок:1-2 смайла,упомяни что обработано ботом. Описание:2-3 предложения на русском. Общий объем — до 1000 символов. Если данные необрабатываемы — верни {{}}. Не используй Markdown-разметку (`json),только чистый JSON.",
@@ -371,6 +373,7 @@ class Config:
         self.AI_ERROR_THRESHOLD: int = self.get_env_var('AI_ERROR_THRESHOLD', default=5, var_type=int)
         self.AUTO_ENABLE_AI: bool = self.get_env_var('AUTO_ENABLE_AI', default=True, var_type=bool)
         self.MAX_CONCURRENT_AI_REQUESTS = int(os.getenv('MAX_CONCURRENT_AI_REQUESTS', 3))
+        self.AI_REQUESTS_PER_MINUTE: int = self.get_env_var('AI_REQUESTS_PER_MINUTE', default=0, var_type=int)
 
         # Параметры контента
         self.MIN_TITLE_LENGTH: int = self.get_env_var('MIN_TITLE_LENGTH', default=0, var_type=int)
@@ -174,14 +174,8 @@ async def run_bot():
     state_manager = StateManager(config.STATE_FILE, config.MAX_ENTRIES_HISTORY, config)
     logger.info("State manager initialized")
     
-    # Создаем TCP коннектор для aiohttp
-    connector = aiohttp.TCPConnector(
-        force_close=True,
-        enable_cleanup_closed=True,
-        limit=0
-    )
-    
     # Инициализируем переменные для управления ресурсами
+    connector: Optional[aiohttp.BaseConnector] = None
     session: Optional[aiohttp.ClientSession] = None
     telegram_bot: Optional[AsyncTelegramBot] = None
     controller: Optional[BotController] = None
@@ -189,8 +183,9 @@ async def run_bot():
     tg_handler = None
     
     try:
-        # Создаем aiohttp сессию
-        session = aiohttp.ClientSession(connector=connector)
+        # Создаем aiohttp сессию с пулом keep-alive соединений (таймаут по умолчанию aiohttp)
+        session = AsyncRSSParser.default_session(timeout=aiohttp.ClientTimeout(total=300, sock_connect=30))
+        connector = session.connector
         logger.info("Created aiohttp session")
         
         # Инициализация Telegram бота
@@ -1,4 +1,3 @@
-from concurrent.futures import ProcessPoolExecutor
 from logging import config
 import re
 from urllib.parse import urljoin, urlparse
@@ -6,18 +5,56 @@ import feedparser
 import logging
 import aiohttp
 import hashlib
-from typing import Any, Dict, List, Optional, Union, Set, Callable
+from html import escape as html_escape
+from typing import Any, Dict, List, Optional, Union, Set, Callable, Tuple, Sequence
 import asyncio
+import sys
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from defusedxml import ElementTree as ET
 from io import BytesIO
-from datetime import datetime
+from datetime import datetime, timezone
 from dateutil import parser as date_parser
-from bs4 import BeautifulSoup, Tag
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 
 logger = logging.getLogger('AsyncRSSParser')
 
+# Предкомпилированные регулярные выражения
+_WS_RE = re.compile(r'\s+')
+_DOCTYPE_RE = re.compile(r'<!DOCTYPE[^>[]*(\[[^]]*\])?>', re.IGNORECASE)
+# Стоп-слова в URL и CSS-классах служебных изображений (иконки, счетчики, реклама)
+_INVALID_IMG_URL_RE = re.compile(r'pixel|icon|logo|spacer|ad|tracker|counter', re.IGNORECASE)
+_INVALID_IMG_CLASS_RE = re.compile(r'icon|logo|ad|thumb|mini|avatar|button|border', re.IGNORECASE)
+_IRRELEVANT_IMG_URL_RE = re.compile(r'pixel|icon|logo|spacer|ad|button|border', re.IGNORECASE)
+_IRRELEVANT_IMG_CLASS_RE = re.compile(r'icon|logo|ad|thumb|mini', re.IGNORECASE)
+# Ключевые слова для оценки релевантности изображения по URL
+_FEATURED_IMG_URL_RE = re.compile(r'main|featured|hero|cover|primary', re.IGNORECASE)
+_SOCIAL_IMG_URL_RE = re.compile(r'social|icon', re.IGNORECASE)
+_NON_DIGIT_RE = re.compile(r'\D')
+# Признаки разметки, которую могут найти DESCRIPTION_IMAGE_SELECTORS
+_IMG_MARKUP_HINT_RE = re.compile(r'<img|<source|data-src', re.IGNORECASE)
+
+# Общий неизменяемый результат для записей без категорий
+_EMPTY_CATEGORIES: Tuple[str, ...] = ()
+
+# Относительные пути изображений на одном сайте часто повторяются
+_cached_urljoin = lru_cache(maxsize=1024)(urljoin)
+
 class AsyncRSSParser:
+    # Фиксированный набор атрибутов экземпляра: без __dict__ на каждый парсер
+    __slots__ = (
+        'session', 'proxy_url', 'controller', 'on_session_recreate',
+        'timeout', 'semaphore', 'config', 'feed_status', 'feed_errors',
+        'max_retries', 'retry_delay',
+        '_feed_cache', '_primary_image_cache', '_all_images_cache'
+    )
+
     MAX_ENCLOSURES = 20  # Максимальное количество вложений для обработки
+    MAX_FEED_BYTES = 5 * 1024 * 1024  # Максимальный размер загружаемой ленты
+    FEED_READ_CHUNK = 64 * 1024  # Размер блока при чтении ленты
+    IMAGE_CACHE_SIZE = 1024  # Максимальное количество страниц в кеше изображений
+    IMAGE_CACHE_TTL = 3600  # Время жизни записи кеша изображений в секундах
     CONTENT_SELECTORS = [
         'article img',
         '.post-content img',
@@ -32,6 +69,36 @@ class AsyncRSSParser:
         '.story__content img'  # Для lenta.ru
     ]
 
+    # Селекторы изображений в HTML-описании в порядке приоритета.
+    # Селекторы вида '.post-content img' покрываются 'img' и не нужны.
+    DESCRIPTION_IMAGE_SELECTORS = [
+        'img',  # Все изображения
+        'picture source[srcset]',
+        '[data-src]'  # Lazy-loaded
+    ]
+    DESCRIPTION_IMAGE_SELECTOR = ', '.join(DESCRIPTION_IMAGE_SELECTORS)
+
+    # OpenGraph/Twitter Card: первый мета-тег с изображением в порядке документа
+    META_IMAGE_SELECTOR = 'meta[property*="image" i], meta[name*="twitter:image" i]'
+
+    # Шаблоны уведомлений о загрузке лент
+    NOTIFICATION_TEMPLATES = {
+        'http': "⚠️ <b>Ошибка загрузки RSS</b>\n└ URL: {url}\n└ Код: {detail}",
+        'loaded': "📥 <b>RSS загружен</b>\n└ URL: {url}\n└ Размер: {detail} KB",
+        'network': "⚠️ <b>Сетевая ошибка</b>\n└ URL: {url}\n└ Ошибка: {detail}",
+        'runtime': "⚠️ <b>Ошибка выполнения</b>\n└ URL: {url}\n└ Ошибка: {detail}",
+        'unknown': "⚠️ <b>Неизвестная ошибка</b>\n└ URL: {url}\n└ Ошибка: {detail}",
+        'too_large': "⚠️ <b>Лента слишком большая</b>\n└ URL: {url}\n└ Размер: более {detail} KB"
+    }
+
+    # Селекторы всех изображений страницы
+    PAGE_IMAGE_SELECTOR = ', '.join([
+        'img',
+        'picture source[srcset]',
+        '[data-src]',
+        '[itemprop="image"]'
+    ])
+
     def __init__(
         self, 
         session: aiohttp.ClientSession, 
@@ -44,12 +111,33 @@ class AsyncRSSParser:
         self.on_session_recreate = on_session_recreate  # Инициализация атрибута
         self.timeout = aiohttp.ClientTimeout(total=30, sock_read=25)
         self.semaphore = asyncio.Semaphore(5)
-        self.executor = ProcessPoolExecutor(max_workers=2)
         self.config = config
         self.feed_status = {}
         self.feed_errors = {}
         self.max_retries = 3  # Максимальное количество попыток
         self.retry_delay = 0.5  # Задержка между попытками в секундах
+        # Кеш разобранных лент: url -> {'etag', 'last_modified', 'sha', 'feed', 'entries'}
+        self._feed_cache: Dict[str, Dict[str, Any]] = {}
+        # TTL-кеши результатов извлечения изображений: url -> (expires_at, result)
+        self._primary_image_cache: OrderedDict = OrderedDict()
+        self._all_images_cache: OrderedDict = OrderedDict()
+
+    @classmethod
+    def default_session(cls, **kwargs) -> aiohttp.ClientSession:
+        """Создает сессию с пулом keep-alive соединений и кешем DNS.
+
+        Соединения переиспользуются между опросами лент, поэтому повторные
+        запросы к тем же хостам обходятся без новых TCP/TLS рукопожатий.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=10,
+            keepalive_timeout=75,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True
+        )
+        kwargs.setdefault('timeout', aiohttp.ClientTimeout(total=30))
+        return aiohttp.ClientSession(connector=connector, **kwargs)
 
     def set_feed_status(self, url: str, active: bool):
         """Устанавливает статус активности для RSS-ленты"""
@@ -94,39 +182,60 @@ class AsyncRSSParser:
                     logger.error("Session closed unexpectedly during retry")
                     return None
                     
+                cached = self._feed_cache.get(url)
+                headers = {'User-Agent': 'RSSBot/1.0'}
+                if cached:
+                    # Условный запрос: сервер ответит 304, если лента не менялась
+                    if cached['etag']:
+                        headers['If-None-Match'] = cached['etag']
+                    if cached['last_modified']:
+                        headers['If-Modified-Since'] = cached['last_modified']
+
                 async with self.session.get(
                     url,
                     proxy=self.proxy_url if self.proxy_url else None,
                     timeout=self.timeout,
-                    headers={'User-Agent': 'RSSBot/1.0'}
+                    headers=headers
                 ) as response:
+                    if response.status == 304 and cached:
+                        logger.debug(f"Feed not modified, using cache: {url}")
+                        return cached['feed']
+
                     if response.status != 200:
                         logger.error(f"HTTP error {response.status} for {url}")
                         
                         # Отправляем уведомление об ошибке
-                        error_msg = (
-                            f"⚠️ <b>Ошибка загрузки RSS</b>\n"
-                            f"└ URL: {url}\n"
-                            f"└ Код: {response.status}"
-                        )
-                        if self.controller:
-                            asyncio.create_task(self.controller._send_status_notification(error_msg))
-                        
+                        self._notify('http', url, response.status)
+                        return None
+
+                    content = await self._read_limited(response)
+                    if content is None:
+                        self.feed_errors[url] = self.feed_errors.get(url, 0) + 1
+                        logger.error(f"Feed {url} exceeds {self.MAX_FEED_BYTES} bytes, skipped")
+                        self._notify('too_large', url, self.MAX_FEED_BYTES // 1024)
                         return None
 
-                    content = await response.read()
                     logger.debug(f"Raw content received for {url}, length: {len(content)} bytes")
                     
                     # Отправляем уведомление об успешной загрузке
-                    success_msg = (
-                        f"📥 <b>RSS загружен</b>\n"
-                        f"└ URL: {url}\n"
-                        f"└ Размер: {len(content)//1024} KB"
-                    )
-                    if self.controller:
-                        asyncio.create_task(self.controller._send_status_notification(success_msg))
-                        
-                    return await self._safe_parse_feed(content)
+                    self._notify('loaded', url, len(content)//1024)
+
+                    # Содержимое не изменилось - повторный разбор не нужен
+                    sha = hashlib.blake2b(content).digest()
+                    if cached and cached['sha'] == sha:
+                        logger.debug(f"Feed content unchanged, using cache: {url}")
+                        return cached['feed']
+
+                    feed = await self._safe_parse_feed(content)
+                    if feed is not None:
+                        self._feed_cache[url] = {
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified'),
+                            'sha': sha,
+                            'feed': feed,
+                            'entries': None
+                        }
+                    return feed
                     
             except aiohttp.ClientOSError as e:
                 if "APPLICATION_DATA_AFTER_CLOSE_NOTIFY" in str(e) and attempt < self.max_retries:
@@ -137,14 +246,7 @@ class AsyncRSSParser:
                     logger.error(f"Error fetching {url}: {str(e)}", exc_info=True)
                     
                     # Отправляем уведомление об ошибке сети
-                    error_msg = (
-                        f"⚠️ <b>Сетевая ошибка</b>\n"
-                        f"└ URL: {url}\n"
-                        f"└ Ошибка: {str(e)[:100]}"
-                    )
-                    if self.controller:
-                        asyncio.create_task(self.controller._send_status_notification(error_msg))
-                        
+                    self._notify('network', url, e)
                     return None
                     
             except RuntimeError as e:
@@ -156,14 +258,7 @@ class AsyncRSSParser:
                     logger.error(f"RuntimeError fetching {url}: {str(e)}", exc_info=True)
                     
                     # Отправляем уведомление об ошибке
-                    error_msg = (
-                        f"⚠️ <b>Ошибка выполнения</b>\n"
-                        f"└ URL: {url}\n"
-                        f"└ Ошибка: {str(e)[:100]}"
-                    )
-                    if self.controller:
-                        asyncio.create_task(self.controller._send_status_notification(error_msg))
-                        
+                    self._notify('runtime', url, e)
                     return None
                     
             except Exception as e:
@@ -171,23 +266,39 @@ class AsyncRSSParser:
                 logger.error(f"Error fetching {url}: {str(e)}", exc_info=True)
                 
                 # Отправляем уведомление об общей ошибке
-                error_msg = (
-                    f"⚠️ <b>Неизвестная ошибка</b>\n"
-                    f"└ URL: {url}\n"
-                    f"└ Ошибка: {str(e)[:100]}"
-                )
-                if self.controller:
-                    asyncio.create_task(self.controller._send_status_notification(error_msg))
-                    
+                self._notify('unknown', url, e)
                 return None
         
         return None
         
+    async def _read_limited(self, response: aiohttp.ClientResponse) -> Optional[bytes]:
+        """Читает тело ответа блоками; возвращает None, если оно больше MAX_FEED_BYTES"""
+        if (response.content_length or 0) > self.MAX_FEED_BYTES:
+            return None
+
+        buffer = bytearray()
+        while chunk := await response.content.read(self.FEED_READ_CHUNK):
+            buffer += chunk
+            if len(buffer) > self.MAX_FEED_BYTES:
+                return None
+        return bytes(buffer)
+
+    def _notify(self, kind: str, url: str, detail: Any) -> None:
+        """Отправляет уведомление о загрузке ленты по шаблону из NOTIFICATION_TEMPLATES"""
+        if self.controller:
+            message = self.NOTIFICATION_TEMPLATES[kind].format(url=url, detail=str(detail)[:100])
+            asyncio.create_task(self.controller._send_status_notification(message))
+
     def get_error_count(self, url: str) -> int:
         """Возвращает количество ошибок для указанного URL"""
         return self.feed_errors.get(url, 0)
 
     async def _safe_parse_feed(self, xml_content: Any) -> Optional[Dict[str, Any]]:
+        """Безопасный парсинг RSS в отдельном потоке, чтобы не блокировать event loop"""
+        return await asyncio.to_thread(self._parse_feed_sync, xml_content)
+
+    @staticmethod
+    def _parse_feed_sync(xml_content: Any) -> Optional[Dict[str, Any]]:
         """Безопасный парсинг RSS с защитой от XXE и обработкой ошибок"""
         try:
             if xml_content is None:
@@ -208,12 +319,7 @@ class AsyncRSSParser:
                 except UnicodeDecodeError:
                     xml_content = xml_content.decode('latin-1', errors='replace')
 
-            cleaned_content = re.sub(
-                r'<!DOCTYPE[^>[]*(\[[^]]*\])?>',
-                '',
-                xml_content,
-                flags=re.IGNORECASE
-            )
+            cleaned_content = _DOCTYPE_RE.sub('', xml_content)
 
             try:
                 xml_bytes = cleaned_content.encode('utf-8')
@@ -225,6 +331,11 @@ class AsyncRSSParser:
                 tree = ET.parse(BytesIO(xml_bytes), parser=parser)
                 root = tree.getroot()
                 if root is not None:
+                    # Документ прошел проверку defusedxml - разбираем исходные байты
+                    # без сериализации дерева обратно в XML
+                    parsed = feedparser.parse(xml_bytes)
+                    if parsed.get('entries'):
+                        return parsed
                     return feedparser.parse(BytesIO(ET.tostring(root)))
             except Exception as e:
                 logger.debug(f"DefusedXML parsing failed, falling back to feedparser: {str(e)}")
@@ -236,13 +347,26 @@ class AsyncRSSParser:
             logger.error(f"Failed to parse feed content: {str(e)}")
             return None
 
-    def parse_entries(self, feed_content: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Парсит содержимое RSS-ленты и извлекает записи"""
+    def parse_entries(self, feed_content: Dict[str, Any], url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Парсит содержимое RSS-ленты и извлекает записи.
+
+        url - адрес, с которого fetch_feed загрузил ленту; по нему берется запись
+        кеша с уже разобранными записями. Без url кеш не используется.
+        """
         entries = []
         if not feed_content or not isinstance(feed_content, dict) or 'entries' not in feed_content:
             logger.debug("No entries found in feed")
             return entries
 
+        # Лента не изменилась с прошлого опроса - возвращаем копии уже разобранных записей
+        # Запись кеша подходит, только если в ней хранится именно эта лента
+        cache_record = self._feed_cache.get(url) if url else None
+        if cache_record and cache_record['feed'] is not feed_content:
+            cache_record = None
+        if cache_record and cache_record['entries'] is not None:
+            logger.debug("Feed unchanged, using cached entries")
+            return [dict(entry) for entry in cache_record['entries']]
+
         seen_guids: Set[str] = set()
 
         for entry in feed_content['entries']:
@@ -253,103 +377,134 @@ class AsyncRSSParser:
                     continue
                 seen_guids.add(guid)
 
-                # Основные поля записи
-                link = self._get_entry_link(entry)
-                description = self._clean_html(getattr(entry, 'summary', getattr(entry, 'description', '')))
-
-                # Извлекаем изображение
-                image_url = self._extract_image_url(entry)
-                if not image_url and link:
-                    # Пробуем извлечь из HTML-описания с базовым URL
-                    base_url = link if link else self._get_feed_base_url(feed_content)
-                    image_url = self._extract_image_from_html(description, base_url)
-
-                entry_data = {
-                    'guid': guid,
-                    'title': self._clean_text(getattr(entry, 'title', 'No title')),
-                    'description': description,
-                    'link': link,
-                    'pub_date': self._get_pub_date(entry),
-                    'image_url': image_url,
-                    'author': self._get_author(entry),
-                    'categories': self._get_categories(entry)
-                }
-                entries.append(entry_data)
+                entries.append(self._build_entry(entry, guid))
             except Exception as e:
                 logger.error(f"Error parsing entry: {str(e)}", exc_info=True)
                 continue
 
         logger.debug(f"Parsed {len(entries)} entries from feed")
+        if cache_record:
+            cache_record['entries'] = [dict(entry) for entry in entries]
         return entries
 
+    def _build_entry(self, entry: Any, guid: str) -> Dict[str, Any]:
+        """Собирает словарь записи, читая каждое поле entry один раз"""
+        get = entry.get
+        description, description_tree = self._parse_description_once(
+            get('summary') or get('description') or ''
+        )
+        return {
+            'guid': guid,
+            'title': self._clean_text(get('title', 'No title')),
+            'description': description,
+            'link': get('link'),
+            'pub_date': self._get_pub_date(entry),
+            # Изображение ищется в уже разобранном HTML описания
+            'image_url': self._extract_image_url(entry, description_tree),
+            'author': get('author'),
+            'categories': self._get_categories(get('tags'))
+        }
+
+    @staticmethod
+    def _parse_description_once(description: str) -> Tuple[str, Optional[LexborHTMLParser]]:
+        """
+        Разбирает HTML описания один раз
+        Возвращает очищенный от тегов текст (с экранированными &, <, >) и дерево для поиска изображений
+        """
+        if not description:
+            return "", None
+        # Обычный текст без разметки и сущностей не нужно разбирать парсером:
+        # достаточно той же нормализации переводов строк и NUL, что делает Lexbor
+        if '<' not in description and '&' not in description:
+            text = description.replace('\r\n', '\n').replace('\r', '\n').replace('\x00', '')
+            return html_escape(text, quote=False).strip(), None
+        tree = LexborHTMLParser(description)
+        text = tree.text() or ''
+        return html_escape(text, quote=False).strip(), tree
+
     def _extract_image_from_html(self, html_content: str, base_url: str) -> Optional[str]:
         """Улучшенный поиск изображений в HTML-контенте"""
-        if not html_content:
+        # Без тегов изображений нечего искать - не тратим время на разбор HTML
+        if not html_content or not _IMG_MARKUP_HINT_RE.search(html_content):
             return None
+        return self._extract_image_from_tree(LexborHTMLParser(html_content), base_url)
 
+    def _extract_image_from_tree(self, tree: LexborHTMLParser, base_url: str) -> Optional[str]:
+        """Ищет изображение в уже разобранном HTML-дереве"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            candidate_images = []
-            
-            # Расширенные селекторы для популярных платформ
-            selectors = [
-                'img',  # Все изображения
-                'picture source[srcset]',
-                '[data-src]',  # Lazy-loaded
-                '.post-content img',
-                '.article-body img',
-                '.content img',
-                '.post__body img',  # Специфично для Хабра
-                '.story__content img'  # Lenta.ru
-            ]
+            best_rank = len(self.DESCRIPTION_IMAGE_SELECTORS)
+            best_url = None
+            base_origin = self._base_origin(base_url)
+            seen_nodes: Set[int] = set()
             
-            for selector in selectors:
-                for element in soup.select(selector):
-                    src = self._get_image_src(element)
-                    if not src:
-                        continue
-                        
-                    normalized_url = self._normalize_image_url(src, base_url)
-                    if not normalized_url:
-                        continue
-                        
-                    # Проверка на релевантность
-                    if self._is_relevant_image(element, normalized_url):
-                        candidate_images.append(normalized_url)
+            for element in tree.css(self.DESCRIPTION_IMAGE_SELECTOR):
+                # Узел, совпавший с несколькими селекторами, возвращается повторно
+                if element.mem_id in seen_nodes:
+                    continue
+                seen_nodes.add(element.mem_id)
+
+                src = self._get_image_src(element)
+                if not src:
+                    continue
+                    
+                normalized_url = self._normalize_image_url(src, base_url, base_origin)
+                if not normalized_url:
+                    continue
+                    
+                # Проверка на релевантность
+                if not self._is_relevant_image(element, normalized_url):
+                    continue
+
+                # Первое релевантное <img> имеет наивысший приоритет - дальше не ищем
+                rank = self._selector_rank(element)
+                if rank == 0:
+                    return normalized_url
+                if rank < best_rank:
+                    best_rank = rank
+                    best_url = normalized_url
             
-            # Возвращаем первое релевантное изображение
-            return candidate_images[0] if candidate_images else None
+            # Иначе первое релевантное изображение с наивысшим приоритетом селектора
+            return best_url
             
         except Exception as e:
             logger.debug(f"HTML content image extraction error: {str(e)}")
             return None
 
+    @classmethod
+    def _selector_rank(cls, element: LexborNode) -> int:
+        """Возвращает индекс первого селектора DESCRIPTION_IMAGE_SELECTORS, которому соответствует элемент"""
+        if element.tag == 'img':
+            return 0
+        for rank, selector in enumerate(cls.DESCRIPTION_IMAGE_SELECTORS[1:], start=1):
+            if element.css_matches(selector):
+                return rank
+        return len(cls.DESCRIPTION_IMAGE_SELECTORS)
+
     @staticmethod
-    def _get_image_src(element: Tag) -> Optional[str]:
+    def _get_image_src(element: LexborNode) -> Optional[str]:
         """Извлекает URL из различных атрибутов"""
+        attrs = element.attributes
         for attr in ['src', 'srcset', 'data-src', 'data-lazy-src']:
-            if attr in element.attrs:
-                value = element[attr]
-                if isinstance(value, list):
-                    value = value[0]
+            if attr in attrs:
+                value = attrs[attr] or ''
                 return value.split()[0] if ' ' in value else value
         return None
 
     @staticmethod
-    def _is_relevant_image(element: Tag, img_url: str) -> bool:
+    def _is_relevant_image(element: LexborNode, img_url: str) -> bool:
         """Определяет, является ли изображение релевантным"""
         # Фильтр по URL
-        if any(bad in img_url.lower() for bad in ['pixel', 'icon', 'logo', 'spacer', 'ad', 'button', 'border']):
+        if _IRRELEVANT_IMG_URL_RE.search(img_url):
             return False
             
         # Фильтр по CSS-классам
-        classes = element.get('class', [])
-        if any(bad in cls.lower() for cls in classes for bad in ['icon', 'logo', 'ad', 'thumb', 'mini']):
+        attrs = element.attributes
+        if _IRRELEVANT_IMG_CLASS_RE.search(attrs.get('class') or ''):
             return False
             
         # Фильтр по размеру (если указан)
-        width = element.get('width')
-        height = element.get('height')
+        width = attrs.get('width')
+        height = attrs.get('height')
         try:
             if width and height:
                 if int(width) < 300 or int(height) < 200:
@@ -359,8 +514,32 @@ class AsyncRSSParser:
             
         return True
 
+    def _cache_get(self, cache: OrderedDict, url: str) -> Tuple[bool, Any]:
+        """Возвращает (найдено, значение) из TTL-кеша, удаляя устаревшую запись"""
+        item = cache.get(url)
+        if item is None:
+            return False, None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del cache[url]
+            return False, None
+        cache.move_to_end(url)
+        return True, value
+
+    def _cache_put(self, cache: OrderedDict, url: str, value: Any) -> None:
+        """Сохраняет значение в TTL-кеш, вытесняя самые старые записи"""
+        cache[url] = (time.monotonic() + self.IMAGE_CACHE_TTL, value)
+        cache.move_to_end(url)
+        while len(cache) > self.IMAGE_CACHE_SIZE:
+            cache.popitem(last=False)
+
     async def extract_primary_image(self, url: str) -> Optional[str]:
         """Извлекает главное изображение со страницы с повторными попытками"""
+        # Одна и та же статья часто встречается в нескольких лентах
+        found, cached = self._cache_get(self._primary_image_cache, url)
+        if found:
+            return cached
+
         for attempt in range(1, self.max_retries + 1):
             try:
                 async with self.session.get(
@@ -369,18 +548,20 @@ class AsyncRSSParser:
                     headers={'User-Agent': 'RSSBot/1.0'}  # Добавляем User-Agent
                 ) as response:
                     html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
+                    tree = LexborHTMLParser(html)
 
                     # 1. Проверка OpenGraph и Twitter Card
-                    if meta_image := self._find_meta_image(soup):
-                        return meta_image
-
                     # 2. Поиск в основном контенте
-                    if content_image := self._find_content_image(soup, url):
-                        return content_image
-
                     # 3. Резервные варианты
-                    return self._find_fallback_image(soup, url)
+                    image = (
+                        self._find_meta_image(tree)
+                        or self._find_content_image(tree, url)
+                        or self._find_fallback_image(tree, url)
+                    )
+                    # Страницы ошибок (403/404/503, проверка Cloudflare) не кешируем
+                    if response.status == 200:
+                        self._cache_put(self._primary_image_cache, url, image)
+                    return image
 
             except (aiohttp.ClientOSError, asyncio.TimeoutError, aiohttp.ServerDisconnectedError) as e:
                 if attempt < self.max_retries:
@@ -398,128 +579,141 @@ class AsyncRSSParser:
     
     async def extract_all_images(self, url: str) -> List[str]:
         """Извлекает все изображения со страницы с глубоким анализом контента"""
+        found, cached = self._cache_get(self._all_images_cache, url)
+        if found:
+            return list(cached)
+
         try:
             async with self.session.get(url, timeout=self.timeout) as response:
                 html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
-
-                # Расширенные селекторы для всех возможных мест с изображениями
-                selectors = [
-                    'img',                          # Все изображения
-                    'picture source[srcset]',
-                    '[data-src]',
-                    '.article-content img',
-                    '.post-content img',
-                    '.content img',
-                    '[itemprop="image"]',
-                    'figure img',
-                    'div[class*="image"] img'
-                ]
+                tree = LexborHTMLParser(html)
 
                 images = []
-                for selector in selectors:
-                    for element in soup.select(selector):
-                        img_url = self._get_image_url(element, url)
-                        if img_url and img_url not in images:
-                            images.append(img_url)
+                seen = set()
+                seen_nodes: Set[int] = set()
+                base_origin = self._base_origin(url)
+                for element in tree.css(self.PAGE_IMAGE_SELECTOR):
+                    # Узел, совпавший с несколькими селекторами, возвращается повторно
+                    if element.mem_id in seen_nodes:
+                        continue
+                    seen_nodes.add(element.mem_id)
+                    img_url = self._normalize_image_url(self._get_image_src(element), url, base_origin)
+                    if img_url and img_url not in seen:
+                        seen.add(img_url)
+                        images.append(img_url)
                 
-                return images
+                # Страницы ошибок (403/404/503, проверка Cloudflare) не кешируем
+                if response.status == 200:
+                    self._cache_put(self._all_images_cache, url, images)
+                return list(images)
 
         except Exception as e:
             logger.error(f"Error extracting images from {url}: {str(e)}")
             return []
 
-    def _find_meta_image(self, soup: BeautifulSoup) -> Optional[str]:
+    def _find_meta_image(self, tree: LexborHTMLParser) -> Optional[str]:
         """Ищет изображение в мета-тегах"""
-        for meta in soup.find_all('meta'):
-            if not isinstance(meta, Tag):
-                continue
-                
-            prop = str(meta.get('property', '')).lower()
-            name = str(meta.get('name', '')).lower()
-            content = str(meta.get('content', ''))
-
-            if any(p in prop for p in ['og:image', 'image']) or \
-            any(n in name for n in ['twitter:image']):
-                return content if content else None
-        return None
+        meta = tree.css_first(self.META_IMAGE_SELECTOR)
+        if meta is None:
+            return None
+        return meta.attributes.get('content') or None
 
-    def _find_content_image(self, soup: BeautifulSoup, base_url: str) -> Optional[str]:
+    def _find_content_image(self, tree: LexborHTMLParser, base_url: str) -> Optional[str]:
         """Ищет изображение в основном контенте с приоритетом по положению и размеру"""
-        candidate_images = []
+        best_score: Optional[int] = None
+        best_url: Optional[str] = None
+        base_origin = self._base_origin(base_url)
+        # Узел, совпавший с несколькими селекторами, оценивается один раз -
+        # при первом (самом приоритетном) из них
+        seen_nodes: Set[int] = set()
         
+        # Селекторы обходятся в порядке приоритета, поэтому при равных баллах
+        # побеждает более приоритетный селектор, затем первое в документе
         for selector in self.CONTENT_SELECTORS:
-            for img in soup.select(selector):
-                if not isinstance(img, Tag):
+            for img in tree.css(selector):
+                if img.mem_id in seen_nodes:
                     continue
+                seen_nodes.add(img.mem_id)
 
-                img_src = img.get('src') or img.get('srcset', '')
-                img_src = str(img_src).split()[0] if img_src else ''
+                img_src = img.attributes.get('src') or img.attributes.get('srcset') or ''
+                img_src = img_src.split()[0] if img_src.strip() else ''
                 
                 if img_src and self._is_valid_image(img, img_src):
-                    normalized_url = self._normalize_image_url(img_src, base_url)
+                    normalized_url = self._normalize_image_url(img_src, base_url, base_origin)
                     if not normalized_url:
                         continue
                         
                     # Оценка релевантности изображения
                     relevance = self._image_relevance_score(img, normalized_url)
-                    candidate_images.append((relevance, normalized_url))
-        
-        if not candidate_images:
-            return None
+                    if best_score is None or relevance > best_score:
+                        best_score = relevance
+                        best_url = normalized_url
         
-        # Сортируем по релевантности (высший балл - первый)
-        candidate_images.sort(key=lambda x: x[0], reverse=True)
-        return candidate_images[0][1]
+        return best_url
 
     @staticmethod
-    def _image_relevance_score(img_tag: Tag, img_url: str) -> int:
+    def _image_relevance_score(img_tag: LexborNode, img_url: str) -> int:
         """Рассчитывает балл релевантности изображения"""
         score = 0
+        attrs = img_tag.attributes
         
         # Бонус за специальные атрибуты
-        if 'data-large-image' in img_tag.attrs:
+        if 'data-large-image' in attrs:
             score += 50
             
         # Бонус за ключевые слова в URL
-        keywords = ['main', 'featured', 'hero', 'cover', 'primary']
-        if any(kw in img_url.lower() for kw in keywords):
+        if _FEATURED_IMG_URL_RE.search(img_url):
             score += 30
         
         # Бонус за размеры (если указаны)
         try:
-            width = int(img_tag.get('width', 0))
-            height = int(img_tag.get('height', 0))
+            width = int(attrs.get('width') or 0)
+            height = int(attrs.get('height') or 0)
             area = width * height
             score += min(area // 1000, 40)  # Макс +40 баллов за большие размеры
         except:
             pass
         
         # Штраф за социальные иконки
-        if 'social' in img_url.lower() or 'icon' in img_url.lower():
+        if _SOCIAL_IMG_URL_RE.search(img_url):
             score -= 20
             
         return score
 
-    def _find_fallback_image(self, soup: BeautifulSoup, base_url: str) -> Optional[str]:
+    def _find_fallback_image(self, tree: LexborHTMLParser, base_url: str) -> Optional[str]:
         """Резервные методы поиска изображений"""
         # Логотип сайта
-        if logo := soup.find('link', rel=['icon', 'shortcut icon']):
-            if isinstance(logo, Tag) and (href := logo.get('href')):
-                href = str(href)
+        if logo := tree.css_first('link[rel~="icon"]'):
+            if href := logo.attributes.get('href'):
                 return self._normalize_image_url(href, base_url)
 
         # Первое подходящее изображение
-        for img in soup.find_all('img'):
-            if isinstance(img, Tag) and (src := img.get('src')):
-                src = str(src)
+        for img in tree.css('img'):
+            if src := img.attributes.get('src'):
                 if self._is_valid_image(img, src):
                     return self._normalize_image_url(src, base_url)
         return None
 
     @staticmethod
-    def _normalize_image_url(url: Optional[str], base_url: str) -> str:
-        """Улучшенная нормализация URL изображения"""
+    def _base_origin(base_url: str) -> str:
+        """Возвращает 'scheme://netloc' базового URL для путей от корня сайта"""
+        if not base_url:
+            return ""
+        parsed_base = urlparse(base_url)
+        return f"{parsed_base.scheme}://{parsed_base.netloc}"
+
+    @classmethod
+    def _normalize_image_url(
+        cls,
+        url: Optional[str],
+        base_url: str,
+        base_origin: Optional[str] = None
+    ) -> str:
+        """Улучшенная нормализация URL изображения.
+
+        base_origin - заранее вычисленный результат _base_origin(base_url),
+        чтобы не разбирать базовый URL заново для каждого изображения.
+        """
         if not url:
             return ""
         
@@ -535,40 +729,37 @@ class AsyncRSSParser:
         if url_str.startswith('/'):
             if not base_url:
                 return ""
-            parsed_base = urlparse(base_url)
-            return f"{parsed_base.scheme}://{parsed_base.netloc}{url_str}"
+            if base_origin is None:
+                base_origin = cls._base_origin(base_url)
+            return f"{base_origin}{url_str}"
             
         # Для относительных путей без слеша в начале
         if not url_str.startswith(('http', '//', '/')):
             if not base_url:
                 return ""
-            return urljoin(base_url, url_str)
+            return _cached_urljoin(base_url, url_str)
             
         return url_str
 
     @staticmethod
-    def _is_valid_image(img_tag: Tag, img_url: str) -> bool:
+    def _is_valid_image(img_tag: LexborNode, img_url: str) -> bool:
         """Улучшенная проверка валидности изображения"""
-        if not img_url or any(x in img_url.lower() for x in ['pixel', 'icon', 'logo', 'spacer', 'ad', 'tracker', 'counter']):
+        if not img_url or _INVALID_IMG_URL_RE.search(img_url):
             return False
 
         # Проверка классов изображения
-        class_list = img_tag.get('class', [])
-        if isinstance(class_list, str):
-            class_list = [class_list]
-        
-        invalid_classes = ['icon', 'logo', 'ad', 'thumb', 'mini', 'avatar', 'button', 'border']
-        if any(invalid in cls.lower() for cls in class_list for invalid in invalid_classes):
+        attrs = img_tag.attributes
+        if _INVALID_IMG_CLASS_RE.search(attrs.get('class') or ''):
             return False
 
         # Проверка размеров
         try:
-            width = img_tag.get('width', '0')
-            height = img_tag.get('height', '0')
+            width = attrs.get('width') or '0'
+            height = attrs.get('height') or '0'
             
             # Преобразуем в числа, удаляя нечисловые символы
-            width = int(''.join(filter(str.isdigit, str(width)))) if width else 0
-            height = int(''.join(filter(str.isdigit, str(height)))) if height else 0
+            width = int(_NON_DIGIT_RE.sub('', str(width))) if width else 0
+            height = int(_NON_DIGIT_RE.sub('', str(height))) if height else 0
             
             # Минимальные размеры для релевантного изображения
             if width >= 300 and height >= 200:
@@ -587,73 +778,72 @@ class AsyncRSSParser:
     @staticmethod
     def _get_feed_base_url(feed_content: Any) -> str:
         """Получает базовый URL из фида"""
-        if hasattr(feed_content, 'href'):
-            return feed_content.href
-        if hasattr(feed_content, 'link'):
-            return feed_content.link
-        return ''
+        return getattr(feed_content, 'href', None) or getattr(feed_content, 'link', None) or ''
 
     @staticmethod
     def _generate_entry_guid(entry: Any) -> str:
         """Генерирует уникальный идентификатор для записи"""
         if guid := getattr(entry, 'guid', None):
             return str(guid)
-        return hashlib.md5(
-            f"{entry.get('link','')}"
-            f"{entry.get('title','')}"
-            f"{entry.get('published','')}"
-            f"{entry.get('updated','')}".encode()
-        ).hexdigest()
+        # Хеш нужен только стабильный, не криптостойкий: BLAKE2b быстрее MD5
+        h = hashlib.blake2b(digest_size=16)
+        for field in ('link', 'title', 'published', 'updated'):
+            h.update(str(entry.get(field, '')).encode())
+            h.update(b'\x1f')
+        return h.hexdigest()
 
     @staticmethod
     def _clean_text(text: str) -> str:
         """Очищает текст от лишних пробелов"""
         if not text:
             return ""
-        return re.sub(r'\s+', ' ', text).strip()
-
-    @staticmethod
-    def _clean_html(html: str) -> str:
-        """Удаляет HTML-теги из текста"""
-        if not html:
-            return ""
-        return re.sub(r'<[^>]+>', '', html).strip()
-
-    @staticmethod
-    def _get_entry_link(entry: Any) -> Optional[str]:
-        """Извлекает ссылку из записи"""
-        if hasattr(entry, 'link'):
-            return entry.link
-        return None
+        return _WS_RE.sub(' ', text).strip()
 
     @staticmethod
     def _get_pub_date(entry: Any) -> str:
         """Извлекает дату публикации"""
-        for attr in ['published', 'updated', 'pubDate', 'date']:
-            if hasattr(entry, attr):
+        # feedparser уже разобрал RFC 822/ISO 8601 даты в struct_time (UTC)
+        for attr in ('published_parsed', 'updated_parsed'):
+            parsed = entry.get(attr)
+            if parsed:
+                try:
+                    return datetime(*parsed[:6], tzinfo=timezone.utc).isoformat()
+                except (TypeError, ValueError):
+                    continue
+
+        for attr in ('published', 'updated', 'pubDate', 'date'):
+            value = entry.get(attr)
+            if value is not None:
+                value = str(value)
+                # Быстрый путь для ISO 8601, медленный dateutil - только для прочих форматов
+                try:
+                    return datetime.fromisoformat(value).isoformat()
+                except ValueError:
+                    pass
                 try:
-                    return date_parser.parse(str(getattr(entry, attr))).isoformat()
+                    return date_parser.parse(value).isoformat()
                 except Exception:
                     continue
         return datetime.now().isoformat()
 
-    def _extract_image_url(self, entry: Any) -> Optional[str]:
+    def _extract_image_url(self, entry: Any, description_tree: Optional[LexborHTMLParser] = None) -> Optional[str]:
         """Улучшенное извлечение URL изображения из записи RSS"""
         # 1. Приоритет: проверка медиа-контента (Atom) - <media:content>
-        if hasattr(entry, 'media_content'):
-            for media in getattr(entry, 'media_content', [])[:self.MAX_ENCLOSURES]:
+        # Элементы media_content/media_thumbnail у feedparser - обычные dict,
+        # поэтому везде используется .get, а не getattr
+        if media_content := entry.get('media_content'):
+            for media in media_content[:self.MAX_ENCLOSURES]:
                 try:
-                    media_type = getattr(media, 'type', '').lower()
+                    media_type = (media.get('type') or '').lower()
                     if media_type.startswith('image/'):
-                        url = getattr(media, 'url', None)
+                        url = media.get('url')
                         if url and str(url).startswith('http'):
                             return str(url)
                 except (AttributeError, TypeError):
                     continue
 
         # 2. Проверка вложений (RSS) - <enclosure> - УЛУЧШЕННАЯ ОБРАБОТКА
-        if hasattr(entry, 'enclosures'):
-            enclosures = getattr(entry, 'enclosures', [])
+        if enclosures := entry.get('enclosures'):
             if not isinstance(enclosures, list):
                 enclosures = [enclosures]
                 
@@ -661,17 +851,17 @@ class AsyncRSSParser:
                 try:
                     # Получаем тип из атрибута type или mime_type
                     enc_type = (
-                        getattr(enclosure, 'type', '') or 
-                        getattr(enclosure, 'mime_type', '')
+                        enclosure.get('type') or 
+                        enclosure.get('mime_type') or ''
                     ).lower()
                     
                     # Проверяем, является ли вложение изображением
                     if enc_type and enc_type.startswith('image/'):
                         # Пытаемся получить URL из различных атрибутов
                         url = (
-                            getattr(enclosure, 'url', None) or
-                            getattr(enclosure, 'href', None) or
-                            getattr(enclosure, 'link', None)
+                            enclosure.get('url') or
+                            enclosure.get('href') or
+                            enclosure.get('link')
                         )
                         
                         if url and str(url).startswith('http'):
@@ -680,14 +870,13 @@ class AsyncRSSParser:
                     continue
 
         # 3. Проверка миниатюр (Media RSS) - <media:thumbnail>
-        if hasattr(entry, 'media_thumbnail'):
-            thumbnails = getattr(entry, 'media_thumbnail', [])
+        if thumbnails := entry.get('media_thumbnail'):
             if not isinstance(thumbnails, list):
                 thumbnails = [thumbnails]
 
             for thumb in thumbnails[:self.MAX_ENCLOSURES]:
                 try:
-                    url = getattr(thumb, 'url', None)
+                    url = thumb.get('url')
                     if url and str(url).startswith('http'):
                         return str(url)
                 except (AttributeError, TypeError):
@@ -696,9 +885,9 @@ class AsyncRSSParser:
         # 4. Проверка структурированных данных (расширенная)
         structured_fields = ['image', 'image_url', 'thumbnail', 'og:image', 'media:content']
         for field in structured_fields:
-            if hasattr(entry, field):
+            field_value = entry.get(field)
+            if field_value is not None:
                 try:
-                    field_value = getattr(entry, field)
                     if isinstance(field_value, str) and field_value.startswith('http'):
                         return field_value
                     elif isinstance(field_value, dict):
@@ -716,45 +905,44 @@ class AsyncRSSParser:
                 except (AttributeError, TypeError, KeyError):
                     continue
 
+        # Базовый URL записи общий для шагов 5 и 6
+        base_url = self._get_feed_base_url(entry)
+
         # 5. Поиск в HTML-контенте описания (для Habr и подобных)
-        if hasattr(entry, 'description') and entry.description:
-            description = getattr(entry, 'description', '')
-            base_url = self._get_feed_base_url(entry) or ''
+        if description_tree is not None:
+            image_url = self._extract_image_from_tree(description_tree, base_url)
+            if image_url:
+                return image_url
+        elif description := getattr(entry, 'description', None):
             image_url = self._extract_image_from_html(description, base_url)
             if image_url:
                 return image_url
 
         # 6. Проверка ссылок в содержании
-        if hasattr(entry, 'content') and entry.content:
-            for content_item in getattr(entry, 'content', []):
-                if hasattr(content_item, 'value'):
-                    base_url = self._get_feed_base_url(entry) or ''
-                    image_url = self._extract_image_from_html(content_item.value, base_url)
-                    if image_url:
-                        return image_url
-
-        return None
+        if content := getattr(entry, 'content', None):
+            # Каждый элемент разбирается отдельно: незакрытый комментарий или кавычка
+            # в одном элементе не должны скрывать изображения в следующих
+            extract = self._extract_image_from_html
+            for content_item in content:
+                if not (value := getattr(content_item, 'value', None)):
+                    continue
+                if image_url := extract(value, base_url):
+                    return image_url
 
-    @staticmethod
-    def _get_author(entry: Any) -> Optional[str]:
-        """Извлекает автора записи"""
-        if hasattr(entry, 'author'):
-            return entry.author
         return None
 
     @staticmethod
-    def _get_categories(entry: Any) -> List[str]:
-        """Извлекает категории записи"""
-        if not hasattr(entry, 'tags'):
-            return []
-
-        categories = []
-        for tag in entry.tags:
-            if hasattr(tag, 'term'):
-                categories.append(tag.term)
-            elif isinstance(tag, dict) and 'term' in tag:
-                categories.append(tag['term'])
-            elif isinstance(tag, str):
-                categories.append(tag)
-
-        return categories
\ No newline at end of file
+    def _get_categories(tags: Any) -> Sequence[str]:
+        """Извлекает категории записи из списка тегов"""
+        if not tags:
+            return _EMPTY_CATEGORIES
+
+        # У feedparser теги - FeedParserDict с атрибутом term, поэтому он проверяется первым.
+        # Категории повторяются от записи к записи, поэтому строки интернируются
+        return [
+            sys.intern(str(term)) for term in (
+                getattr(tag, 'term', None) or
+                (tag.get('term') if isinstance(tag, dict) else tag if isinstance(tag, str) else None)
+                for tag in tags
+            ) if term
+        ]
\ No newline at end of file